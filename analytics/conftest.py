@@ -0,0 +1 @@
+# Keeps this directory on sys.path so tests can `import main`
@@ -2,25 +2,92 @@
 # License, v. 2.0. If a copy of the MPL was not distributed with this
 # file, You can obtain one at http://mozilla.org/MPL/2.0/.
 
+import os
+
+# Native thread budget for each analysis. Requests run concurrently in the threadpool,
+# so letting every KMeans/BLAS call claim all cores oversubscribes the CPU. The OpenMP
+# default has to be in place before NumPy and scikit-learn load their runtimes.
+THREADS_PER_REQUEST = int(os.getenv("ANALYTICS_THREADS_PER_REQUEST", max(1, (os.cpu_count() or 1) // 4)))
+os.environ.setdefault("OMP_NUM_THREADS", str(THREADS_PER_REQUEST))
+
 from fastapi import FastAPI, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any, Optional
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from threadpoolctl import threadpool_limits
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from collections import OrderedDict
+import base64
+import functools
+import hashlib
 import logging
-import os
+import math
+import threading
+import time
+import orjson
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# BLAS pools (OpenBLAS/MKL) ignore OMP_NUM_THREADS in some builds, so cap them directly.
+# The limit is process-wide: scoping it per request would race between concurrent requests.
+threadpool_limits(limits=THREADS_PER_REQUEST, user_api="blas")
+
 app = FastAPI(
     title="Navixy IoT Query Analytics Service",
     description="Python-based analytics service for Navixy IoT Query Dashboard",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
+# Payload limits - configurable via environment variables
+MAX_BODY_BYTES = int(os.getenv("ANALYTICS_MAX_BODY_BYTES", 128 * 1024 * 1024))
+MAX_ROWS = int(os.getenv("ANALYTICS_MAX_ROWS", 1_000_000))
+
+class BodySizeLimitMiddleware:
+    """Reject request bodies larger than max_bytes with 413 before they are parsed.
+
+    A declared Content-Length is checked up front; bodies without one (chunked uploads)
+    are counted as they stream in and cut off as soon as they pass the limit.
+    """
+    
+    def __init__(self, app, max_bytes: int):
+        self.app = app
+        self.max_bytes = max_bytes
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        detail = f"Request body exceeds the limit of {self.max_bytes} bytes"
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_bytes:
+            response = ORJSONResponse({"detail": detail}, status_code=413)
+            await response(scope, receive, send)
+            return
+        
+        received = 0
+        
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+        
+        await self.app(scope, limited_receive, send)
+
+# Added before CORS so that CORS stays the outermost layer and 413s carry its headers
+app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_BODY_BYTES)
+
 # CORS middleware - configurable via environment variable
 default_origins = ["http://localhost:8080", "http://localhost:3000", "http://localhost:8081"]
 additional_origins = os.environ.get("CORS_ALLOWED_ORIGINS", "").split(",")
@@ -48,16 +115,169 @@ class AnalyticsResponse(BaseModel):
 class CorrelationRequest(BaseModel):
     data: List[Dict[str, Any]]
     columns: List[str]
+    dtype: str = "float64"
+    matrix_format: str = "nested"
+
+class ColumnarCorrelationRequest(BaseModel):
+    columns_data: Dict[str, List[Optional[float]]]
+    columns: List[str]
+    dtype: str = "float64"
+    matrix_format: str = "nested"
 
 class RegressionRequest(BaseModel):
     data: List[Dict[str, Any]]
     target_column: str
     feature_columns: List[str]
+    dtype: str = "float64"
 
 class ClusteringRequest(BaseModel):
     data: List[Dict[str, Any]]
     columns: List[str]
     n_clusters: int = 3
+    algorithm: str = "elkan"
+    use_minibatch: bool = False
+    dtype: str = "float64"
+
+# Floating-point precisions accepted for analysis inputs. float64 is the default: float32
+# keeps only ~7 significant digits, which quantizes coordinates and odometer readings
+# before any math runs. float32 is opt-in for low-magnitude data where halving the
+# memory traffic of the numeric kernels matters more.
+SUPPORTED_DTYPES = {"float32": np.float32, "float64": np.float64}
+
+# Correlation matrix encodings: "nested" is {col: {col: value}}; "upper_tri_f32" ships the
+# strict upper triangle as one base64 little-endian float32 buffer (see _correlation_result)
+SUPPORTED_MATRIX_FORMATS = ("nested", "upper_tri_f32")
+
+# Result cache - dashboards re-issue identical analyses on every re-render
+# Approximate cost of one boxed scalar or string header plus its slot in the parent
+# container (a float is 24 bytes; dict slots and hash-table slack make up the rest)
+_ITEM_NBYTES = 64
+_NESTED_TYPES = (dict, list, tuple, str, bytes, np.ndarray)
+
+def _result_nbytes(value: Any) -> int:
+    """Estimate the memory held by a result: array buffers, string lengths, and
+    _ITEM_NBYTES for every container, scalar and string"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return _ITEM_NBYTES + len(value)
+    if isinstance(value, dict):
+        value = list(value.values())
+    elif not isinstance(value, (list, tuple)):
+        return _ITEM_NBYTES
+    # Plain scalars are costed in bulk; only nested values are walked
+    nested = [item for item in value if isinstance(item, _NESTED_TYPES)]
+    return _ITEM_NBYTES * (1 + len(value) - len(nested)) + sum(map(_result_nbytes, nested))
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results whose entries expire after a TTL.
+
+    Entries are bounded by count and by their estimated size (see _result_nbytes):
+    regression predictions and cluster labels grow with the row count and nested
+    correlation matrices with the square of the column count, so a handful of large
+    results would otherwise pin far more memory than the entry count suggests.
+    """
+    
+    def __init__(self, maxsize: int, ttl_seconds: float, max_bytes: int):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, nbytes, result = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._nbytes -= nbytes
+                return None
+            self._entries.move_to_end(key)
+            return result
+    
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        nbytes = _result_nbytes(result)
+        if self.maxsize <= 0 or nbytes > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (time.monotonic(), nbytes, result)
+            self._nbytes += nbytes
+            while len(self._entries) > self.maxsize or self._nbytes > self.max_bytes:
+                _, (_, evicted_nbytes, _) = self._entries.popitem(last=False)
+                self._nbytes -= evicted_nbytes
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+result_cache = ResultCache(
+    maxsize=int(os.getenv("ANALYTICS_CACHE_SIZE", 128)),
+    ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", 300)),
+    max_bytes=int(os.getenv("ANALYTICS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+)
+
+def _has_non_finite(value: Any) -> bool:
+    """Whether a JSON-like value holds NaN or +/-Infinity anywhere"""
+    if isinstance(value, float):
+        return not math.isfinite(value)
+    if isinstance(value, dict):
+        return any(map(_has_non_finite, value.values()))
+    if isinstance(value, (list, tuple)):
+        return any(map(_has_non_finite, value))
+    return False
+
+def _payload_key(name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Optional[str]:
+    """Hash an analysis call into a cache key, or None if the payload cannot be keyed faithfully"""
+    try:
+        payload = orjson.dumps([name, args, kwargs], option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        return None
+    # orjson writes NaN and +/-Infinity as null, so such payloads would share a key with
+    # their null-valued twins; only payloads that contain a null need the scan
+    if b"null" in payload and _has_non_finite([args, kwargs]):
+        return None
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def memoize_analysis(method: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """Serve repeated analyses with identical inputs from result_cache; failures are not cached"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = _payload_key(method.__name__, args, kwargs)
+        if key is not None:
+            cached = result_cache.get(key)
+            if cached is not None:
+                return cached
+        result = method(self, *args, **kwargs)
+        if key is not None:
+            result_cache.set(key, result)
+        return result
+    return wrapper
+
+def _row_count(data: Any) -> int:
+    """Rows in a list of records, or in a mapping of column name to values"""
+    if isinstance(data, dict):
+        return max(map(len, data.values()), default=0)
+    return len(data)
+
+def limit_rows(method: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """Reject datasets above MAX_ROWS with a 413 before they are hashed for the cache or converted"""
+    @functools.wraps(method)
+    def wrapper(self, data, *args, **kwargs):
+        n_rows = _row_count(data)
+        if n_rows > MAX_ROWS:
+            message = f"Dataset has {n_rows} rows, which exceeds the limit of {MAX_ROWS}"
+            logger.error(f"Analysis rejected: {message}")
+            raise HTTPException(status_code=413, detail=message)
+        return method(self, data, *args, **kwargs)
+    return wrapper
 
 # Analytics Engine
 class AnalyticsEngine:
@@ -65,130 +285,253 @@ class AnalyticsEngine:
         self.pandas = pd
         self.numpy = np
     
-    def correlation_analysis(self, data: List[Dict[str, Any]], columns: List[str]) -> Dict[str, Any]:
+    @limit_rows
+    @memoize_analysis
+    def correlation_analysis(
+        self,
+        data: List[Dict[str, Any]],
+        columns: List[str],
+        dtype: str = "float64",
+        matrix_format: str = "nested"
+    ) -> Dict[str, Any]:
         """Perform correlation analysis on specified columns"""
         try:
-            df = pd.DataFrame(data)
-            
             # Select only numeric columns
-            numeric_df = df[columns].select_dtypes(include=[np.number])
+            X, numeric_columns = self._records_to_ndarray(data, columns, dtype)
             
-            if numeric_df.empty:
+            if not numeric_columns:
                 raise ValueError("No numeric columns found for correlation analysis")
             
-            correlation_matrix = numeric_df.corr()
+            return self._correlation_result(X, numeric_columns, matrix_format)
+        except Exception as e:
+            logger.error(f"Correlation analysis error: {str(e)}")
+            raise HTTPException(status_code=400, detail=str(e))
+    
+    @limit_rows
+    @memoize_analysis
+    def columnar_correlation_analysis(
+        self,
+        columns_data: Dict[str, List[Optional[float]]],
+        columns: List[str],
+        dtype: str = "float64",
+        matrix_format: str = "nested"
+    ) -> Dict[str, Any]:
+        """Perform correlation analysis on column-oriented data"""
+        try:
+            np_dtype = self._resolve_dtype(dtype)
+            # Requested names may repeat; keep the first occurrence of each
+            columns = list(dict.fromkeys(columns))
+            missing = [col for col in columns if col not in columns_data]
+            if missing:
+                raise ValueError(f"Columns not found in columns_data: {', '.join(missing)}")
+            if not columns:
+                raise ValueError("No numeric columns found for correlation analysis")
+            if len({len(columns_data[col]) for col in columns}) > 1:
+                raise ValueError("All columns in columns_data must have the same length")
             
-            return {
-                "correlation_matrix": correlation_matrix.to_dict(),
-                "columns": numeric_df.columns.tolist(),
-                "summary": {
-                    "total_columns": len(numeric_df.columns),
-                    "strong_correlations": self._find_strong_correlations(correlation_matrix)
-                }
-            }
+            # One contiguous conversion per column; nulls become NaN
+            X = np.column_stack([np.asarray(columns_data[col], dtype=np_dtype) for col in columns])
+            
+            return self._correlation_result(X, columns, matrix_format)
         except Exception as e:
             logger.error(f"Correlation analysis error: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
     
-    def regression_analysis(self, data: List[Dict[str, Any]], target: str, features: List[str]) -> Dict[str, Any]:
+    def _correlation_result(self, X: np.ndarray, numeric_columns: List[str], matrix_format: str = "nested") -> Dict[str, Any]:
+        """Build the correlation response for a numeric matrix with one column per name.
+
+        With ``matrix_format="upper_tri_f32"`` the matrix is returned as
+        ``corr_upper_tri_f32_b64``: the entries above the diagonal in row-major order
+        (``np.triu_indices(len(columns), k=1)``) packed as little-endian float32 and
+        base64-encoded. The diagonal is always 1 and the matrix is symmetric, so clients
+        can rebuild it from that buffer and ``columns``.
+        """
+        if matrix_format not in SUPPORTED_MATRIX_FORMATS:
+            raise ValueError(
+                f"Unsupported matrix_format: {matrix_format}. Expected one of: {', '.join(SUPPORTED_MATRIX_FORMATS)}"
+            )
+        
+        if len(X) < 2 or np.isnan(X).any():
+            # Missing values need pandas' pairwise-complete correlation
+            matrix = pd.DataFrame(X, columns=numeric_columns, copy=False).corr().to_numpy(copy=True)
+        else:
+            # Clean data: a single BLAS-backed pass
+            with np.errstate(divide="ignore", invalid="ignore"):
+                matrix = np.atleast_2d(np.corrcoef(X, rowvar=False, dtype=X.dtype))
+            # corrcoef centres with an inexact mean, so a constant column such as 0.1 keeps
+            # rounding residue instead of zero variance; blank it to NaN as pandas does
+            constant = X.min(axis=0) == X.max(axis=0)
+            if constant.any():
+                matrix[constant, :] = np.nan
+                matrix[:, constant] = np.nan
+        
+        # Self-correlation is 1 by definition, but rounding can leave 0.99999994;
+        # undefined diagonals (constant or empty columns) stay NaN
+        diagonal = np.diag_indices_from(matrix)
+        matrix[diagonal] = np.where(np.isnan(matrix[diagonal]), np.nan, 1.0)
+        
+        if matrix_format == "upper_tri_f32":
+            upper = matrix[np.triu_indices(len(numeric_columns), k=1)].astype("<f4")
+            result = {"corr_upper_tri_f32_b64": base64.b64encode(upper.tobytes()).decode("ascii")}
+        else:
+            # Same {column: {row: value}} shape as DataFrame.to_dict(), built from a single tolist()
+            result = {
+                "correlation_matrix": {
+                    col: dict(zip(numeric_columns, values))
+                    for col, values in zip(numeric_columns, matrix.T.tolist())
+                }
+            }
+        
+        result["columns"] = numeric_columns
+        result["summary"] = {
+            "total_columns": len(numeric_columns),
+            "strong_correlations": self._find_strong_correlations(matrix, numeric_columns)
+        }
+        return result
+    
+    @limit_rows
+    @memoize_analysis
+    def regression_analysis(self, data: List[Dict[str, Any]], target: str, features: List[str], dtype: str = "float64") -> Dict[str, Any]:
         """Perform linear regression analysis"""
         try:
-            from sklearn.linear_model import LinearRegression
-            from sklearn.metrics import r2_score, mean_squared_error
-            
-            df = pd.DataFrame(data)
+            # Prepare data: features and target in one pass, with the target last
+            # unless it is also a feature
+            features = list(dict.fromkeys(features))
+            target_is_feature = target in features
+            values, numeric_columns = self._records_to_ndarray(
+                data, features if target_is_feature else features + [target], dtype
+            )
             
-            # Prepare data
-            X = df[features].select_dtypes(include=[np.number])
-            y = df[target]
+            if target in numeric_columns:
+                if target_is_feature:
+                    X, feature_columns = values, numeric_columns
+                else:
+                    X, feature_columns = values[:, :-1], numeric_columns[:-1]
+            else:
+                feature_columns = []
             
-            if X.empty or y.isna().all():
+            if not feature_columns:
                 raise ValueError("Invalid data for regression analysis")
             
-            # Handle missing values
-            X = X.fillna(X.mean())
-            y = y.fillna(y.mean())
+            # Handle missing values (X and y are views of the same matrix)
+            self._impute_column_means(values)
+            y = values[:, numeric_columns.index(target)]
+            n_samples = len(X)
             
-            # Fit model
-            model = LinearRegression()
-            model.fit(X, y)
+            # Fit model: least squares on centered data, which recovers the intercept
+            # exactly the way sklearn's LinearRegression does
+            X_mean = X.mean(axis=0)
+            y_mean = y.mean()
+            coefficients, *_ = np.linalg.lstsq(X - X_mean, y - y_mean, rcond=None)
+            intercept = y_mean - X_mean @ coefficients
             
             # Predictions
-            y_pred = model.predict(X)
+            y_pred = X @ coefficients + intercept
             
-            # Metrics
-            r2 = r2_score(y, y_pred)
-            mse = mean_squared_error(y, y_pred)
+            # Metrics (r2_score conventions: undefined below two samples, and a
+            # constant target scores 1.0 only when fitted exactly)
+            ss_res = float(np.sum((y - y_pred) ** 2))
+            ss_tot = float(np.sum((y - y_mean) ** 2))
+            if n_samples < 2:
+                r2 = np.nan
+            elif ss_tot > 0:
+                r2 = 1.0 - ss_res / ss_tot
+            else:
+                r2 = 1.0 if ss_res == 0 else 0.0
+            mse = ss_res / n_samples
             
             return {
-                "coefficients": dict(zip(X.columns, model.coef_)),
-                "intercept": float(model.intercept_),
+                "coefficients": dict(zip(feature_columns, coefficients.tolist())),
+                "intercept": float(intercept),
                 "r_squared": float(r2),
                 "mean_squared_error": float(mse),
-                "feature_importance": dict(zip(X.columns, abs(model.coef_))),
-                "predictions": y_pred.tolist()
+                "feature_importance": dict(zip(feature_columns, np.abs(coefficients).tolist())),
+                "predictions": y_pred
             }
         except Exception as e:
             logger.error(f"Regression analysis error: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
     
-    def clustering_analysis(self, data: List[Dict[str, Any]], columns: List[str], n_clusters: int = 3) -> Dict[str, Any]:
-        """Perform K-means clustering analysis"""
+    @limit_rows
+    @memoize_analysis
+    def clustering_analysis(
+        self,
+        data: List[Dict[str, Any]],
+        columns: List[str],
+        n_clusters: int = 3,
+        algorithm: str = "elkan",
+        use_minibatch: bool = False,
+        dtype: str = "float64"
+    ) -> Dict[str, Any]:
+        """Perform K-means clustering analysis.
+
+        Uses a single initialisation (``n_init=1``) rather than sklearn's multi-start
+        default, and ``use_minibatch`` switches to MiniBatchKMeans. Both are several
+        times faster on dashboard-sized data; the trade-off is that labels and centers
+        can vary more between similar inputs than with a best-of-10 fit.
+        """
         try:
-            from sklearn.cluster import KMeans
-            from sklearn.preprocessing import StandardScaler
-            
-            df = pd.DataFrame(data)
-            
             # Select numeric columns
-            numeric_df = df[columns].select_dtypes(include=[np.number])
+            X, numeric_columns = self._records_to_ndarray(data, columns, dtype)
             
-            if numeric_df.empty:
+            if not numeric_columns:
                 raise ValueError("No numeric columns found for clustering")
             
             # Handle missing values
-            numeric_df = numeric_df.fillna(numeric_df.mean())
+            missing = self._impute_column_means(X)
             
-            # Standardize features
-            scaler = StandardScaler()
-            scaled_data = scaler.fit_transform(numeric_df)
+            # Standardize features (same result as StandardScaler: float64 statistics applied
+            # in place to a copy in X's dtype, and columns that are constant up to rounding
+            # keep unit scale). Rounding the mean to float32 first would shift large-magnitude
+            # columns such as odometers by up to half a float32 step
+            mean = X.mean(axis=0, dtype=np.float64)
+            std = X.std(axis=0, dtype=np.float64)
+            std[std <= len(X) * np.finfo(np.float64).eps * np.abs(mean)] = 1.0
+            scaled_data = X.copy()
+            scaled_data -= mean
+            scaled_data /= std
+            
+            # KMeans validates with order="C" and its Cython distance kernels walk rows, so
+            # a Fortran-ordered matrix would be silently copied back; keep it C-contiguous
+            scaled_data = np.ascontiguousarray(scaled_data)
             
             # Perform clustering
-            kmeans = KMeans(n_clusters=n_clusters, random_state=42)
+            if use_minibatch:
+                kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=4096, n_init=1, random_state=42)
+            else:
+                kmeans = KMeans(n_clusters=n_clusters, n_init=1, algorithm=algorithm, random_state=42)
             clusters = kmeans.fit_predict(scaled_data)
             
-            # Add cluster labels to original data
-            df_with_clusters = df.copy()
-            df_with_clusters['cluster'] = clusters
+            # Cluster means cover observed values only: put the imputed cells back to NaN,
+            # which the grouped mean skips (the model no longer needs X)
+            X[missing] = np.nan
             
             return {
-                "clusters": clusters.tolist(),
-                "cluster_centers": kmeans.cluster_centers_.tolist(),
+                "clusters": clusters,
+                "cluster_centers": kmeans.cluster_centers_,
                 "inertia": float(kmeans.inertia_),
                 "n_clusters": n_clusters,
-                "cluster_summary": self._cluster_summary(df_with_clusters, numeric_df.columns.tolist())
+                "cluster_summary": self._cluster_summary(pd.DataFrame(X, columns=numeric_columns, copy=False), clusters)
             }
         except Exception as e:
             logger.error(f"Clustering analysis error: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
     
+    @limit_rows
+    @memoize_analysis
     def statistical_summary(self, data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate comprehensive statistical summary"""
         try:
             df = pd.DataFrame(data)
             
-            numeric_df = df.select_dtypes(include=[np.number])
-            categorical_df = df.select_dtypes(include=['object'])
+            numeric_columns, categorical_columns = self._split_columns_by_kind(df)
+            numeric_df = df.loc[:, numeric_columns]
             
             summary = {
                 "data_shape": df.shape,
                 "numeric_summary": numeric_df.describe().to_dict() if not numeric_df.empty else {},
                 "categorical_summary": {
-                    col: {
-                        "unique_count": df[col].nunique(),
-                        "most_frequent": df[col].mode().iloc[0] if not df[col].mode().empty else None,
-                        "missing_count": df[col].isna().sum()
-                    } for col in categorical_df.columns
+                    col: self._categorical_summary(df[col]) for col in categorical_columns
                 },
                 "missing_data": df.isna().sum().to_dict(),
                 "data_types": df.dtypes.astype(str).to_dict()
@@ -199,35 +542,143 @@ class AnalyticsEngine:
             logger.error(f"Statistical summary error: {str(e)}")
             raise HTTPException(status_code=400, detail=str(e))
     
-    def _find_strong_correlations(self, corr_matrix: pd.DataFrame, threshold: float = 0.7) -> List[Dict[str, Any]]:
+    def _resolve_dtype(self, dtype: str) -> type:
+        """Map a requested precision name to its NumPy type"""
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype: {dtype}. Expected one of: {', '.join(SUPPORTED_DTYPES)}")
+        return SUPPORTED_DTYPES[dtype]
+    
+    def _records_to_ndarray(
+        self,
+        data: List[Dict[str, Any]],
+        columns: List[str],
+        dtype: str = "float64"
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Build a float matrix from the requested columns of a list of records.
+
+        Missing and null values become NaN. Columns holding any non-numeric value (or no
+        values at all) are dropped, mirroring ``select_dtypes(include=[np.number])``;
+        names that appear in no record raise ValueError, like ``df[columns]`` would.
+        """
+        # Requested names may repeat; keep the first occurrence of each
+        columns = list(dict.fromkeys(columns))
+        np_dtype = self._resolve_dtype(dtype)
+        
+        # pandas' C-level record constructor, restricted to the requested columns
+        df = pd.DataFrame(data, columns=columns)
+        
+        # A name absent from every record comes back all-null, so only all-null columns
+        # need a scan of the record keys
+        empty = {col for col in columns if df[col].isna().all()}
+        unknown = [col for col in columns if col in empty and not any(col in row for row in data)]
+        if unknown:
+            raise ValueError(f"Columns not found in data: {', '.join(unknown)}")
+        
+        numeric_columns = [col for col in self._split_columns_by_kind(df)[0] if col not in empty]
+        if len(numeric_columns) < len(columns):
+            df = df[numeric_columns]
+        # Callers impute in place, so always hand back a writable array we own
+        return df.to_numpy(dtype=np_dtype, copy=True), numeric_columns
+    
+    def _impute_column_means(self, X: np.ndarray) -> np.ndarray:
+        """Replace NaNs with their column mean in place and return the mask of filled-in cells"""
+        missing = np.isnan(X)
+        if missing.any():
+            col_means = np.nanmean(X, axis=0)
+            rows, cols = np.nonzero(missing)
+            X[rows, cols] = col_means[cols]
+        return missing
+    
+    def _split_columns_by_kind(self, df: pd.DataFrame) -> Tuple[List[str], List[str]]:
+        """Split columns into numeric and categorical names in a single pass over the dtypes"""
+        numeric_columns = []
+        categorical_columns = []
+        for col, dtype in df.dtypes.items():
+            # Same selection as select_dtypes(include=[np.number]) / (include=['object'])
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+                numeric_columns.append(col)
+            elif pd.api.types.is_object_dtype(dtype) or isinstance(dtype, pd.StringDtype):
+                categorical_columns.append(col)
+        return numeric_columns, categorical_columns
+    
+    def _categorical_summary(self, column: pd.Series) -> Dict[str, Any]:
+        """Derive unique count, most frequent value and missing count from one value_counts pass"""
+        counts = column.value_counts(dropna=False)
+        present = counts[counts.index.notna()]
+        return {
+            "unique_count": len(present),
+            "most_frequent": self._most_frequent(present),
+            "missing_count": int(counts.sum() - present.sum())
+        }
+    
+    def _most_frequent(self, counts: pd.Series) -> Any:
+        """Most frequent value from value_counts output; ties go to the smallest value, like mode()"""
+        if not len(counts):
+            return None
+        tied = counts.index[counts.to_numpy() == counts.iloc[0]]
+        if len(tied) == 1:
+            return tied[0]
+        try:
+            return tied.min()
+        except TypeError:
+            # Unorderable mixes (e.g. str and int): mode() leaves them unsorted too
+            return tied[0]
+    
+    def _find_strong_correlations(self, corr_matrix: np.ndarray, columns: List[str], threshold: float = 0.7) -> List[Dict[str, Any]]:
         """Find strong correlations above threshold"""
-        strong_corrs = []
-        for i in range(len(corr_matrix.columns)):
-            for j in range(i+1, len(corr_matrix.columns)):
-                corr_value = corr_matrix.iloc[i, j]
-                if abs(corr_value) >= threshold:
-                    strong_corrs.append({
-                        "column1": corr_matrix.columns[i],
-                        "column2": corr_matrix.columns[j],
-                        "correlation": float(corr_value)
-                    })
-        return strong_corrs
+        rows, cols = np.triu_indices(len(columns), k=1)
+        upper = corr_matrix[rows, cols]
+        # NaN correlations (e.g. constant columns) compare False and are skipped
+        mask = np.abs(upper) >= threshold
+        return [
+            {
+                "column1": columns[i],
+                "column2": columns[j],
+                "correlation": corr_value
+            }
+            for i, j, corr_value in zip(rows[mask].tolist(), cols[mask].tolist(), upper[mask].tolist())
+        ]
     
-    def _cluster_summary(self, df: pd.DataFrame, numeric_columns: List[str]) -> Dict[str, Any]:
+    def _cluster_summary(self, numeric_df: pd.DataFrame, clusters: np.ndarray) -> Dict[str, Any]:
         """Generate summary statistics for each cluster"""
+        # One grouped pass for all clusters instead of a boolean mask per cluster
+        sizes = np.bincount(clusters)
+        means = numeric_df.groupby(clusters).mean()
+        numeric_columns = numeric_df.columns.tolist()
         cluster_summary = {}
-        for cluster_id in df['cluster'].unique():
-            cluster_data = df[df['cluster'] == cluster_id]
+        for cluster_id, row in zip(means.index.tolist(), means.to_numpy().tolist()):
             cluster_summary[f"cluster_{cluster_id}"] = {
-                "size": len(cluster_data),
-                "percentage": len(cluster_data) / len(df) * 100,
-                "numeric_means": cluster_data[numeric_columns].mean().to_dict() if numeric_columns else {}
+                "size": int(sizes[cluster_id]),
+                "percentage": sizes[cluster_id] / len(clusters) * 100,
+                "numeric_means": dict(zip(numeric_columns, row))
             }
         return cluster_summary
 
 # Initialize analytics engine
 analytics_engine = AnalyticsEngine()
 
+def analytics_response(success: bool, result: Dict[str, Any], message: Optional[str] = None) -> ORJSONResponse:
+    """Return an AnalyticsResponse-shaped body rendered by orjson.
+
+    Returning the response directly skips FastAPI's pydantic re-encoding of the result,
+    so NumPy arrays and scalars are serialized natively (OPT_SERIALIZE_NUMPY).
+    """
+    return ORJSONResponse({"success": success, "result": result, "message": message})
+
+def analytics_error(error: Exception) -> ORJSONResponse:
+    """Return the success=false body for an exception raised while serving an endpoint.
+
+    Engine errors are HTTPExceptions, whose str() is empty on Starlette 0.27, so their
+    detail becomes the message. Payload-limit rejections keep their 413 status; every
+    other failure is reported with a 200 as before.
+    """
+    if isinstance(error, HTTPException):
+        response = analytics_response(success=False, result={}, message=str(error.detail))
+        if error.status_code == 413:
+            response.status_code = 413
+        return response
+    return analytics_response(success=False, result={}, message=str(error))
+
 # API Endpoints
 @app.get("/")
 async def root():
@@ -237,87 +688,139 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "analytics"}
 
-@app.post("/correlation", response_model=AnalyticsResponse)
+@app.post("/correlation", response_model=AnalyticsResponse, deprecated=True)
 async def correlation_analysis(request: CorrelationRequest):
-    """Perform correlation analysis on specified columns"""
+    """Perform correlation analysis on specified columns.
+
+    Deprecated in favour of /correlation/columnar, which avoids rebuilding
+    columns from a list of row dicts.
+    """
+    try:
+        result = await run_in_threadpool(
+            analytics_engine.correlation_analysis,
+            request.data,
+            request.columns,
+            request.dtype,
+            request.matrix_format
+        )
+        return analytics_response(success=True, result=result)
+    except Exception as e:
+        return analytics_error(e)
+
+@app.post("/correlation/columnar", response_model=AnalyticsResponse)
+async def columnar_correlation_analysis(request: ColumnarCorrelationRequest):
+    """Perform correlation analysis on column-oriented data"""
     try:
-        result = analytics_engine.correlation_analysis(request.data, request.columns)
-        return AnalyticsResponse(success=True, result=result)
+        result = await run_in_threadpool(
+            analytics_engine.columnar_correlation_analysis,
+            request.columns_data,
+            request.columns,
+            request.dtype,
+            request.matrix_format
+        )
+        return analytics_response(success=True, result=result)
     except Exception as e:
-        return AnalyticsResponse(success=False, result={}, message=str(e))
+        return analytics_error(e)
 
 @app.post("/regression", response_model=AnalyticsResponse)
 async def regression_analysis(request: RegressionRequest):
     """Perform linear regression analysis"""
     try:
-        result = analytics_engine.regression_analysis(
+        result = await run_in_threadpool(
+            analytics_engine.regression_analysis,
             request.data, 
             request.target_column, 
-            request.feature_columns
+            request.feature_columns,
+            request.dtype
         )
-        return AnalyticsResponse(success=True, result=result)
+        return analytics_response(success=True, result=result)
     except Exception as e:
-        return AnalyticsResponse(success=False, result={}, message=str(e))
+        return analytics_error(e)
 
 @app.post("/clustering", response_model=AnalyticsResponse)
 async def clustering_analysis(request: ClusteringRequest):
     """Perform K-means clustering analysis"""
     try:
-        result = analytics_engine.clustering_analysis(
+        result = await run_in_threadpool(
+            analytics_engine.clustering_analysis,
             request.data, 
             request.columns, 
-            request.n_clusters
+            request.n_clusters,
+            request.algorithm,
+            request.use_minibatch,
+            request.dtype
         )
-        return AnalyticsResponse(success=True, result=result)
+        return analytics_response(success=True, result=result)
     except Exception as e:
-        return AnalyticsResponse(success=False, result={}, message=str(e))
+        return analytics_error(e)
 
 @app.post("/statistical-summary", response_model=AnalyticsResponse)
 async def statistical_summary(data: List[Dict[str, Any]]):
     """Generate comprehensive statistical summary of the data"""
     try:
-        result = analytics_engine.statistical_summary(data)
-        return AnalyticsResponse(success=True, result=result)
+        result = await run_in_threadpool(analytics_engine.statistical_summary, data)
+        return analytics_response(success=True, result=result)
     except Exception as e:
-        return AnalyticsResponse(success=False, result={}, message=str(e))
+        return analytics_error(e)
+
+def _analyze_correlation(request: AnalyticsRequest) -> Dict[str, Any]:
+    if not request.parameters.get("columns"):
+        raise ValueError("Columns parameter required for correlation analysis")
+    return analytics_engine.correlation_analysis(
+        request.data, 
+        request.parameters["columns"],
+        request.parameters.get("dtype", "float64"),
+        request.parameters.get("matrix_format", "nested")
+    )
+
+def _analyze_regression(request: AnalyticsRequest) -> Dict[str, Any]:
+    if not request.parameters.get("target_column") or not request.parameters.get("feature_columns"):
+        raise ValueError("target_column and feature_columns parameters required for regression")
+    return analytics_engine.regression_analysis(
+        request.data,
+        request.parameters["target_column"],
+        request.parameters["feature_columns"],
+        request.parameters.get("dtype", "float64")
+    )
+
+def _analyze_clustering(request: AnalyticsRequest) -> Dict[str, Any]:
+    if not request.parameters.get("columns"):
+        raise ValueError("Columns parameter required for clustering")
+    return analytics_engine.clustering_analysis(
+        request.data,
+        request.parameters["columns"],
+        request.parameters.get("n_clusters", 3),
+        request.parameters.get("algorithm", "elkan"),
+        request.parameters.get("use_minibatch", False),
+        request.parameters.get("dtype", "float64")
+    )
+
+def _analyze_summary(request: AnalyticsRequest) -> Dict[str, Any]:
+    return analytics_engine.statistical_summary(request.data)
+
+# analysis_type -> handler for /analyze, built once at import
+ANALYSIS_HANDLERS: Dict[str, Callable[[AnalyticsRequest], Dict[str, Any]]] = {
+    "correlation": _analyze_correlation,
+    "regression": _analyze_regression,
+    "clustering": _analyze_clustering,
+    "summary": _analyze_summary,
+}
 
 @app.post("/analyze", response_model=AnalyticsResponse)
 async def general_analysis(request: AnalyticsRequest):
     """General analysis endpoint that routes to specific analysis types"""
     try:
-        analysis_type = request.analysis_type.lower()
-        
-        if analysis_type == "correlation":
-            if not request.parameters.get("columns"):
-                raise ValueError("Columns parameter required for correlation analysis")
-            result = analytics_engine.correlation_analysis(
-                request.data, 
-                request.parameters["columns"]
-            )
-        elif analysis_type == "regression":
-            if not request.parameters.get("target_column") or not request.parameters.get("feature_columns"):
-                raise ValueError("target_column and feature_columns parameters required for regression")
-            result = analytics_engine.regression_analysis(
-                request.data,
-                request.parameters["target_column"],
-                request.parameters["feature_columns"]
-            )
-        elif analysis_type == "clustering":
-            if not request.parameters.get("columns"):
-                raise ValueError("Columns parameter required for clustering")
-            result = analytics_engine.clustering_analysis(
-                request.data,
-                request.parameters["columns"],
-                request.parameters.get("n_clusters", 3)
-            )
-        elif analysis_type == "summary":
-            result = analytics_engine.statistical_summary(request.data)
-        else:
-            raise ValueError(f"Unknown analysis type: {analysis_type}")
+        # Exact lowercase names hit directly; other casings fall back to .lower()
+        handler = ANALYSIS_HANDLERS.get(request.analysis_type)
+        if handler is None:
+            handler = ANALYSIS_HANDLERS.get(request.analysis_type.lower())
+        if handler is None:
+            raise ValueError(f"Unknown analysis type: {request.analysis_type.lower()}")
         
-        return AnalyticsResponse(success=True, result=result)
+        result = await run_in_threadpool(handler, request)
+        return analytics_response(success=True, result=result)
     except Exception as e:
-        return AnalyticsResponse(success=False, result={}, message=str(e))
+        return analytics_error(e)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,86 @@
+import math
+
+import pytest
+
+from main import ResultCache, _payload_key, _result_nbytes, analytics_engine, result_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    result_cache.clear()
+    yield
+    result_cache.clear()
+
+
+def test_repeated_analysis_is_served_from_cache():
+    data = [{"a": float(i), "b": float(i % 5)} for i in range(50)]
+
+    first = analytics_engine.correlation_analysis(data, ["a", "b"])
+    second = analytics_engine.correlation_analysis(data, ["a", "b"])
+
+    assert second is first
+
+
+@pytest.mark.parametrize("special", [math.inf, -math.inf, math.nan])
+def test_non_finite_values_do_not_share_a_key_with_null(special):
+    # orjson encodes NaN and +/-Infinity as null; a shared key would hand the
+    # null payload the result computed for the non-finite one
+    data = [{"a": float(i % 7), "b": float(i % 3)} for i in range(20)]
+    with_special = [dict(row) for row in data]
+    with_special[0]["a"] = special
+    with_null = [dict(row) for row in data]
+    with_null[0]["a"] = None
+
+    assert _payload_key("correlation_analysis", (with_special, ["a", "b"]), {}) is None
+
+    analytics_engine.correlation_analysis(with_special, ["a", "b"])
+    after_special = analytics_engine.correlation_analysis(with_null, ["a", "b"])
+    result_cache.clear()
+    fresh = analytics_engine.correlation_analysis(with_null, ["a", "b"])
+
+    assert after_special["correlation_matrix"]["a"]["b"] == pytest.approx(fresh["correlation_matrix"]["a"]["b"])
+
+
+def test_nan_and_null_summaries_are_kept_apart():
+    nan_summary = analytics_engine.statistical_summary([{"a": math.nan}])
+    null_summary = analytics_engine.statistical_summary([{"a": None}])
+
+    assert nan_summary["data_types"]["a"] == "float64"
+    assert null_summary["data_types"]["a"] == "object"
+
+
+def test_entries_are_evicted_least_recently_used_first():
+    cache = ResultCache(maxsize=2, ttl_seconds=60, max_bytes=1 << 20)
+    cache.set("a", {"value": 1})
+    cache.set("b", {"value": 2})
+    cache.get("a")
+    cache.set("c", {"value": 3})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"value": 1}
+    assert cache.get("c") == {"value": 3}
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("main.time.monotonic", lambda: now[0])
+    cache = ResultCache(maxsize=4, ttl_seconds=10, max_bytes=1 << 20)
+    cache.set("a", {"value": 1})
+
+    now[0] += 11
+
+    assert cache.get("a") is None
+
+
+def test_nested_correlation_results_count_toward_the_byte_limit():
+    data = [{f"c{j}": float((i * (j + 1)) % 11) for j in range(40)} for i in range(30)]
+    result = analytics_engine.correlation_analysis(data, [f"c{j}" for j in range(40)])
+    nbytes = _result_nbytes(result)
+    assert nbytes >= 40 * 40 * 24  # at least one boxed float per matrix cell
+    cache = ResultCache(maxsize=16, ttl_seconds=60, max_bytes=nbytes * 3 // 2)
+
+    cache.set("first", result)
+    cache.set("second", result)
+
+    assert cache.get("first") is None
+    assert cache.get("second") is result
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+from sklearn.cluster import KMeans
+
+from main import analytics_engine
+
+
+@pytest.mark.parametrize("dtype, atol", [("float32", 1e-6), ("float64", 1e-9)])
+def test_large_magnitude_columns_are_standardized_in_float64(dtype, atol):
+    # Odometer-scale values sit where float32 steps are 0.125, so rounding the
+    # column mean to float32 before subtracting shifts the scaled data visibly
+    rng = np.random.default_rng(0)
+    odo = 1.234e6 + rng.normal(0, 50, 300)
+    speed = rng.uniform(0, 90, 300)
+    data = [{"odo": float(o), "speed": float(s)} for o, s in zip(odo, speed)]
+
+    result = analytics_engine.clustering_analysis(data, ["odo", "speed"], 3, dtype=dtype)
+
+    X = np.column_stack([odo, speed]).astype(dtype).astype(np.float64)
+    scaled = ((X - X.mean(axis=0)) / X.std(axis=0)).astype(dtype)
+    expected = KMeans(n_clusters=3, n_init=1, algorithm="elkan", random_state=42).fit(scaled)
+    np.testing.assert_array_equal(result["clusters"], expected.labels_)
+    np.testing.assert_allclose(result["cluster_centers"], expected.cluster_centers_, rtol=0, atol=atol)
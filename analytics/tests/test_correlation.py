@@ -0,0 +1,33 @@
+import math
+
+import pytest
+
+from main import analytics_engine
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_constant_columns_have_nan_correlations(dtype):
+    # Constant values that are not exactly representable leave rounding residue
+    # after centring; they must still be reported as undefined, like pandas does
+    data = [{"k1": 0.1, "k2": 12.7, "v": float(i % 7)} for i in range(1000)]
+
+    result = analytics_engine.correlation_analysis(data, ["k1", "k2", "v"], dtype)
+
+    matrix = result["correlation_matrix"]
+    for col in ("k1", "k2"):
+        for other in ("k1", "k2", "v"):
+            assert math.isnan(matrix[col][other])
+            assert math.isnan(matrix[other][col])
+    assert matrix["v"]["v"] == pytest.approx(1.0)
+    assert result["summary"]["strong_correlations"] == []
+
+
+@pytest.mark.parametrize("dtype", ["float32", "float64"])
+def test_diagonal_is_exactly_one(dtype):
+    data = [{"lat": 55.75 + (i % 13) * 1e-5, "odo": 1.234e6 + i * 0.37} for i in range(500)]
+
+    result = analytics_engine.correlation_analysis(data, ["lat", "odo"], dtype)
+
+    matrix = result["correlation_matrix"]
+    assert matrix["lat"]["lat"] == 1.0
+    assert matrix["odo"]["odo"] == 1.0
@@ -0,0 +1,66 @@
+import asyncio
+
+import orjson
+import pytest
+
+import main
+from main import (
+    AnalyticsRequest,
+    ColumnarCorrelationRequest,
+    CorrelationRequest,
+    columnar_correlation_analysis,
+    correlation_analysis,
+    general_analysis,
+)
+
+
+@pytest.fixture(autouse=True)
+def row_limit(monkeypatch):
+    monkeypatch.setattr(main, "MAX_ROWS", 3)
+    main.result_cache.clear()
+
+
+def call(endpoint, request):
+    response = asyncio.run(endpoint(request))
+    return response.status_code, orjson.loads(response.body)
+
+
+def test_datasets_over_the_row_limit_are_rejected_with_413():
+    rows = [{"a": float(i), "b": float(i % 2)} for i in range(4)]
+
+    status, body = call(general_analysis, AnalyticsRequest(data=rows, analysis_type="summary"))
+
+    assert status == 413
+    assert body == {
+        "success": False,
+        "result": {},
+        "message": "Dataset has 4 rows, which exceeds the limit of 3",
+    }
+
+
+def test_columnar_row_limit_uses_the_longest_column():
+    request = ColumnarCorrelationRequest(columns_data={"a": [1.0, 2.0, 3.0, 4.0]}, columns=["a"])
+
+    status, body = call(columnar_correlation_analysis, request)
+
+    assert status == 413
+    assert "exceeds the limit of 3" in body["message"]
+
+
+def test_datasets_at_the_row_limit_are_analyzed():
+    rows = [{"a": float(i), "b": float(i % 2)} for i in range(3)]
+
+    status, body = call(correlation_analysis, CorrelationRequest(data=rows, columns=["a", "b"]))
+
+    assert status == 200
+    assert body["success"] is True
+
+
+def test_engine_errors_report_their_detail():
+    rows = [{"a": 1.0}]
+
+    status, body = call(correlation_analysis, CorrelationRequest(data=rows, columns=["zz"]))
+
+    assert status == 200
+    assert body["success"] is False
+    assert body["message"] == "Columns not found in data: zz"
@@ -0,0 +1,24 @@
+import pandas as pd
+
+from main import analytics_engine
+
+
+def test_most_frequent_ties_go_to_smallest_value():
+    data = [{"name": value} for value in ["b", "a", "b", "a", "c"]]
+
+    summary = analytics_engine.statistical_summary(data)
+
+    categorical = summary["categorical_summary"]["name"]
+    assert categorical["most_frequent"] == pd.Series(["b", "a", "b", "a", "c"]).mode().iloc[0] == "a"
+    assert categorical["unique_count"] == 3
+    assert categorical["missing_count"] == 0
+
+
+def test_most_frequent_with_unorderable_ties():
+    data = [{"mixed": value} for value in ["x", 1, "x", 1, None]]
+
+    summary = analytics_engine.statistical_summary(data)
+
+    categorical = summary["categorical_summary"]["mixed"]
+    assert categorical["most_frequent"] in ("x", 1)
+    assert categorical["missing_count"] == 1